@@ -6,23 +6,112 @@ and generates a structured radiology report via Claude.
 """
 
 import os
+import asyncio
 import base64
+import io
 import json
 import re
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 import pydicom
+import pydicom.config
+from pydicom.pixel_data_handlers import pylibjpeg_handler
 from PIL import Image
 import numpy as np
 
-# Lazy import anthropic so missing API key doesn't break app load
-def _get_client():
-    from anthropic import Anthropic
+# orjson parses faster; fall back to stdlib json if it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Try the C-based pylibjpeg decoders (JPEG, JPEG-LS, JPEG 2000, RLE) first when installed;
+# pydicom skips handlers whose packages are missing, so the other handlers remain as fallback
+pydicom.config.pixel_data_handlers = [pylibjpeg_handler] + [
+    handler for handler in pydicom.config.pixel_data_handlers if handler is not pylibjpeg_handler
+]
+
+def _api_key() -> str:
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key or api_key == "your_key_here":
         raise ValueError("ANTHROPIC_API_KEY is not set or is placeholder. Add it to .env")
-    return Anthropic(api_key=api_key)
+    return api_key
+
+
+# Lazy import anthropic so missing API key doesn't break app load.
+# Cached so every call reuses one client and its keep-alive connection pool (the client is
+# thread-safe); a missing key raises and is not cached, so it is re-checked on the next call.
+@lru_cache(maxsize=1)
+def _get_client():
+    from anthropic import Anthropic
+    return Anthropic(api_key=_api_key())
+
+
+@lru_cache(maxsize=1)
+def _get_async_client():
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(api_key=_api_key())
+
+
+def _parse_one_header(path: str, index: int) -> Optional[Tuple[str, float, int]]:
+    """
+    Read the header of one DICOM file and decide whether it is a sagittal T2 slice.
+
+    Args:
+        path: Path to the DICOM file.
+        index: Position of the file in the study listing; used as InstanceNumber fallback.
+
+    Returns:
+        (path, slice_location_or_instance, instance) for sagittal T2 slices, otherwise None.
+    """
+    try:
+        ds = pydicom.dcmread(
+            path,
+            stop_before_pixels=True,
+            specific_tags=[
+                "SeriesDescription",
+                "SequenceName",
+                "ImageOrientationPatient",
+                "SliceLocation",
+                "InstanceNumber",
+            ],
+        )
+    except Exception:
+        return None
+    desc = (getattr(ds, "SeriesDescription", None) or "") + " " + (getattr(ds, "SequenceName", None) or "")
+    desc_upper = desc.upper()
+    if "T2" not in desc_upper:
+        return None
+    # Sagittal: typically SAG in description or orientation
+    orientation = getattr(ds, "ImageOrientationPatient", None)
+    is_sagittal = "SAG" in desc_upper
+    if not is_sagittal and orientation is not None and len(orientation) >= 6:
+        # Rough sagittal check: first row of orientation ~ (0,0,±1) or similar
+        try:
+            o = [float(orientation[i]) for i in range(6)]
+            if abs(o[0]) < 0.3 and abs(o[1]) < 0.3:
+                is_sagittal = True
+        except (TypeError, ValueError):
+            pass
+    if not is_sagittal:
+        return None
+    slice_loc = None
+    if hasattr(ds, "SliceLocation"):
+        try:
+            slice_loc = float(ds.SliceLocation)
+        except (TypeError, ValueError):
+            pass
+    instance = getattr(ds, "InstanceNumber", index)
+    try:
+        instance = int(instance)
+    except (TypeError, ValueError):
+        instance = index
+    return (path, slice_loc if slice_loc is not None else instance, instance)
 
 
 def get_sagittal_t2_slice_paths(study_dir: str) -> List[str]:
@@ -48,43 +137,10 @@ def get_sagittal_t2_slice_paths(study_dir: str) -> List[str]:
     if not paths:
         return []
 
-    # Load and filter to T2 sagittal
-    candidates = []
-    for path in paths:
-        try:
-            ds = pydicom.dcmread(path, stop_before_pixels=False)
-        except Exception:
-            continue
-        desc = (getattr(ds, "SeriesDescription", None) or "") + " " + (getattr(ds, "SequenceName", None) or "")
-        desc_upper = desc.upper()
-        if "T2" not in desc_upper:
-            continue
-        # Sagittal: typically SAG in description or orientation
-        orientation = getattr(ds, "ImageOrientationPatient", None)
-        is_sagittal = "SAG" in desc_upper
-        if not is_sagittal and orientation is not None and len(orientation) >= 6:
-            # Rough sagittal check: first row of orientation ~ (0,0,±1) or similar
-            try:
-                o = [float(orientation[i]) for i in range(6)]
-                if abs(o[0]) < 0.3 and abs(o[1]) < 0.3:
-                    is_sagittal = True
-            except (TypeError, ValueError):
-                pass
-        if not is_sagittal:
-            continue
-        slice_loc = None
-        if hasattr(ds, "SliceLocation"):
-            try:
-                slice_loc = float(ds.SliceLocation)
-            except (TypeError, ValueError):
-                pass
-        instance = getattr(ds, "InstanceNumber", len(candidates))
-        try:
-            instance = int(instance)
-        except (TypeError, ValueError):
-            instance = len(candidates)
-        candidates.append((path, slice_loc if slice_loc is not None else instance, instance))
-        ds = None
+    # Load headers in parallel (I/O bound) and filter to T2 sagittal
+    with ThreadPoolExecutor(max_workers=min(16, len(paths))) as ex:
+        results = list(ex.map(_parse_one_header, paths, range(len(paths))))
+    candidates = [r for r in results if r is not None]
 
     if not candidates:
         # Fallback: use first few files as "sagittal" if no T2 SAG found
@@ -103,6 +159,71 @@ def get_sagittal_t2_slice_paths(study_dir: str) -> List[str]:
     return [candidates[i][0] for i in indices]
 
 
+# Per-thread scratch buffers for pixel normalization (one per dtype, most recent shape only)
+# and PNG encoding. Conversions run on long-lived executor threads, so the cache stays bounded.
+_SCRATCH = threading.local()
+# Frames larger than this get a fresh buffer instead of pinning one in the thread
+_SCRATCH_MAX_ELEMENTS = 2048 * 2048
+
+
+def _scratch(shape: Tuple[int, ...], dtype) -> np.ndarray:
+    """Return a reusable buffer of the given shape/dtype for the current thread."""
+    if np.prod(shape) > _SCRATCH_MAX_ELEMENTS:
+        return np.empty(shape, dtype=dtype)
+    buffers = getattr(_SCRATCH, "buffers", None)
+    if buffers is None:
+        buffers = _SCRATCH.buffers = {}
+    key = np.dtype(dtype).str
+    buf = buffers.get(key)
+    if buf is None or buf.shape != shape:
+        buf = buffers[key] = np.empty(shape, dtype=dtype)
+    return buf
+
+
+def _png_buffer() -> io.BytesIO:
+    """
+    Return this thread's PNG output buffer, rewound to the start. It is not truncated
+    (BytesIO.truncate shrinks its allocation), so callers read only the first tell() bytes.
+    """
+    buf = getattr(_SCRATCH, "png_buf", None)
+    if buf is None:
+        buf = _SCRATCH.png_buf = io.BytesIO()
+    buf.seek(0)
+    return buf
+
+
+def _normalize_to_uint8(pixels: np.ndarray, volume: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Scale a non-uint8 pixel array to 0-255 uint8.
+
+    Float data is clipped at 0 and scaled by its maximum; integer data is min-max
+    scaled. Scaling statistics come from `volume` when given (the whole multi-frame
+    array `pixels` was taken from), so only the selected frame is converted. Each
+    reduction runs once and intermediates go into reused buffers.
+    """
+    if volume is None:
+        volume = pixels
+    tmp = _scratch(pixels.shape, np.float32)
+    out = _scratch(pixels.shape, np.uint8)
+    if pixels.dtype == np.float32 or pixels.dtype == np.float64:
+        # Max of the values clipped at 0, as float32 (the buffer precision)
+        mx = float(np.float32(max(volume.max(), 0)))
+        if mx <= 0:
+            out.fill(0)
+            return out
+        np.maximum(pixels, 0, out=tmp)
+    else:
+        mn = volume.min()
+        mx = float(volume.max()) - float(mn)
+        if mx <= 0:
+            out.fill(0)
+            return out
+        np.subtract(pixels, mn, out=tmp, dtype=np.float32)
+    np.multiply(tmp, 255.0 / mx, out=tmp)
+    np.copyto(out, tmp, casting="unsafe")
+    return out
+
+
 def dicom_to_png_base64(dicom_path: str) -> str:
     """
     Convert a single DICOM image to PNG and return base64-encoded string.
@@ -114,33 +235,28 @@ def dicom_to_png_base64(dicom_path: str) -> str:
         Base64-encoded PNG string (with data URL prefix for Claude).
     """
     ds = pydicom.dcmread(dicom_path)
-    pixels = ds.pixel_array
-
-    if pixels.dtype == np.float32 or pixels.dtype == np.float64:
-        pixels = np.clip(pixels, 0, None)
-        if pixels.max() > 0:
-            pixels = (pixels / pixels.max() * 255).astype(np.uint8)
-        else:
-            pixels = np.zeros_like(pixels, dtype=np.uint8)
-    elif pixels.dtype != np.uint8:
-        if pixels.max() > pixels.min():
-            pixels = ((pixels - pixels.min()) / (pixels.max() - pixels.min()) * 255).astype(np.uint8)
-        else:
-            pixels = np.zeros_like(pixels, dtype=np.uint8)
+    volume = pixels = ds.pixel_array
 
     if len(pixels.shape) == 3:
-        # Multi-frame: take middle frame
+        # Multi-frame: take middle frame (scaled with the whole volume's range)
         frame = pixels.shape[0] // 2
         pixels = pixels[frame]
 
+    if pixels.dtype != np.uint8:
+        pixels = _normalize_to_uint8(pixels, volume)
+
     img = Image.fromarray(pixels, mode="L")
     if img.width > 512 or img.height > 512:
-        img.thumbnail((512, 512), Image.Resampling.LANCZOS)
-
-    import io
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    b64 = base64.standard_b64encode(buf.getvalue()).decode("ascii")
+        # BOX is area averaging (like cv2.INTER_AREA): far cheaper than LANCZOS for downscaling
+        img.thumbnail((512, 512), Image.Resampling.BOX)
+
+    buf = _png_buffer()
+    # Fast zlib level: payload goes to the API, not long-term storage
+    img.save(buf, format="PNG", compress_level=1)
+    size = buf.tell()
+    # Release the view before returning so the buffer can be written again on the next call
+    with buf.getbuffer() as view:
+        b64 = base64.standard_b64encode(view[:size]).decode("ascii")
     return f"data:image/png;base64,{b64}"
 
 
@@ -179,22 +295,23 @@ IMPRESSION:
 2. [Secondary findings]
 3. [Additional findings if relevant]
 
-Use precise medical terminology. For disc herniations, use the updated nomenclature (protrusion, extrusion, sequestration). Specify location (central, paracentral, foraminal, extraforaminal) and laterality (left, right, bilateral). If the image quality or field of view does not allow assessment of a level, say so. Do not invent findings; describe only what can be reasonably inferred from the image."""
+Use precise medical terminology. For disc herniations, use the updated nomenclature (protrusion, extrusion, sequestration). Specify location (central, paracentral, foraminal, extraforaminal) and laterality (left, right, bilateral). If the image quality or field of view does not allow assessment of a level, say so. Do not invent findings; describe only what can be reasonably inferred from the image.
 
+CONFIDENCE:
+After the IMPRESSION, append a confidence block rating each finding based on image quality and clarity of pathology. Put a single JSON object between the markers below, with no other text inside them:
+<!--CONFIDENCE-->
+{"overall_confidence": "high|medium|low", "level_confidence": {"L1-L2": "high|medium|low", "L2-L3": "high|medium|low", "L3-L4": "high|medium|low", "L4-L5": "high|medium|low", "L5-S1": "high|medium|low"}, "low_confidence_notes": ["brief reason for any low/medium level"]}
+<!--/CONFIDENCE-->
+Rate "high" when the finding is clearly visible and unambiguous; "medium" when partially limited by technique or artifact; "low" when image quality or field of view significantly limits assessment."""
 
-def analyze_with_claude(image_base64_list: List[str]) -> str:
-    """
-    Send one or more PNG images (base64) to Claude and return the raw text report.
 
-    Args:
-        image_base64_list: List of data URL strings (data:image/png;base64,...).
+REPORT_MAX_TOKENS = 2560
 
-    Returns:
-        Raw report text from Claude.
-    """
-    client = _get_client()
+
+def _report_content(image_base64_list: List[str]) -> List[Dict[str, Any]]:
+    """Build the user message content (up to 3 images plus instruction) for a report request."""
     content = []
-    for i, data_url in enumerate(image_base64_list[:3]):
+    for data_url in image_base64_list[:3]:
         content.append({
             "type": "image",
             "source": {
@@ -207,15 +324,11 @@ def analyze_with_claude(image_base64_list: List[str]) -> str:
         "type": "text",
         "text": "Generate the structured radiology report for this/these sagittal T2 lumbar spine MRI image(s).",
     })
+    return content
 
-    model = os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-5")
-    response = client.messages.create(
-        model=model,
-        max_tokens=2048,
-        system=RADIOLOGY_SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": content}],
-    )
 
+def _response_text(response) -> str:
+    """Concatenate the text blocks of a Claude response."""
     text = ""
     for block in response.content:
         if hasattr(block, "text"):
@@ -223,21 +336,73 @@ def analyze_with_claude(image_base64_list: List[str]) -> str:
     return text.strip()
 
 
+async def analyze_with_claude_async(image_base64_list: List[str]) -> str:
+    """
+    Send one or more PNG images (base64) to Claude and return the raw text report.
+    Uses the shared AsyncAnthropic client.
+
+    Args:
+        image_base64_list: List of data URL strings (data:image/png;base64,...).
+
+    Returns:
+        Raw report text from Claude.
+    """
+    response = await _get_async_client().messages.create(
+        model=os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-5"),
+        max_tokens=REPORT_MAX_TOKENS,
+        system=RADIOLOGY_SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": _report_content(image_base64_list)}],
+    )
+    return _response_text(response)
+
+
 # Standard disc levels to check for in reports
 DISC_LEVELS = ["L1-L2", "L2-L3", "L3-L4", "L4-L5", "L5-S1"]
+# Alternate spelling accepted by validate_report (e.g. "L4/L5")
+_DISC_LEVELS_SLASH = [level.replace("-", "/") for level in DISC_LEVELS]
+
+# Report parsing patterns, compiled once at import
+_LEVELS_ALT = "|".join(re.escape(lev) for lev in DISC_LEVELS)
+# Splitting on level headers yields [preamble, level, body, level, body, ...] in one pass
+_LEVEL_SPLIT_RE = re.compile(rf"\b({_LEVELS_ALT})\s*:?\s*[-–]?\s*", re.IGNORECASE)
+_IMPRESSION_RES = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"\bIMPRESSION\s*:?\s*\n([\s\S]*)",
+        r"\bIMPRESSION\s*:?\s*([\s\S]*)",
+        r"\bCONCLUSION\s*:?\s*\n([\s\S]*)",
+    )
+]
+_FINDINGS_RES = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"\bFINDINGS\s*:?\s*\n([\s\S]*?)(?=\n\s*IMPRESSION\b|\n\s*CONCLUSION\b|\Z)",
+        r"\bFINDINGS\s*:?\s*([\s\S]*?)(?=IMPRESSION|CONCLUSION|\Z)",
+    )
+]
+_IMPRESSION_WORD_RE = re.compile(r"\bIMPRESSION\b", re.IGNORECASE)
+_CODE_FENCE_HEAD_RE = re.compile(r"^```(?:json)?\s*")
+_CODE_FENCE_TAIL_RE = re.compile(r"\s*```\s*$")
+_CONFIDENCE_BLOCK_RE = re.compile(r"<!--\s*CONFIDENCE\s*-->([\s\S]*?)(?:<!--\s*/CONFIDENCE\s*-->|\Z)")
 
 
-def _extract_section(text: str, section_name: str, next_section_names: Optional[List[str]] = None) -> str:
-    """Extract a section (e.g. FINDINGS, IMPRESSION) from report text. Handles various formats."""
-    if not text or not isinstance(text, str):
-        return ""
+@lru_cache(maxsize=None)
+def _section_re(section_name: str, next_section_names: Optional[Tuple[str, ...]]) -> "re.Pattern[str]":
+    """Compile (once per section/terminator combination) the pattern used by _extract_section."""
     pattern = rf"\b{re.escape(section_name)}\s*:?\s*\n?([\s\S]*?)"
     if next_section_names:
         next_pattern = "|".join(re.escape(n) for n in next_section_names)
         pattern += rf"(?=\n\s*(?:{next_pattern})|\Z)"
     else:
         pattern += r"(?=\n\s*\n|\Z)"
-    match = re.search(pattern, text, re.IGNORECASE)
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _extract_section(text: str, section_name: str, next_section_names: Optional[List[str]] = None) -> str:
+    """Extract a section (e.g. FINDINGS, IMPRESSION) from report text. Handles various formats."""
+    if not text or not isinstance(text, str):
+        return ""
+    match = _section_re(section_name, tuple(next_section_names) if next_section_names else None).search(text)
     if match:
         return match.group(1).strip()
     return ""
@@ -257,21 +422,12 @@ def _extract_level_findings(findings_text: str) -> Dict[str, str]:
     level_findings: Dict[str, str] = {level: "" for level in DISC_LEVELS}
     if not findings_text:
         return level_findings
-    # Match "L1-L2:", "L2-L3:", "L5-S1:", etc. – text until next level or end
-    levels_alt = "|".join(re.escape(lev) for lev in DISC_LEVELS)
-    level_pattern = rf"({levels_alt})\s*:?\s*[-–]?\s*([\s\S]*?)(?={levels_alt}\s*:?|\Z)"
-    for match in re.finditer(level_pattern, findings_text, re.IGNORECASE):
-        level_key = _normalize_level_key(match.group(1))
+    # Split on "L1-L2:", "L2-L3:", "L5-S1:", etc. – each body runs until the next level or end
+    parts = _LEVEL_SPLIT_RE.split(findings_text)
+    for key, body in zip(parts[1::2], parts[2::2]):
+        level_key = _normalize_level_key(key)
         if level_key:
-            level_findings[level_key] = match.group(2).strip()
-    # Fallback: line-by-line for any level we missed
-    for level in DISC_LEVELS:
-        if level_findings[level]:
-            continue
-        pat = rf"\b{re.escape(level)}\s*:?\s*[-–]?\s*(.+?)(?=\n\s*(?:L[1-5]-|L5-S1|\Z))"
-        m = re.search(pat, findings_text, re.IGNORECASE | re.DOTALL)
-        if m:
-            level_findings[level] = m.group(1).strip()
+            level_findings[level_key] = body.strip()
     return level_findings
 
 
@@ -293,14 +449,57 @@ Return a single JSON object only, no other text. Use this exact structure:
 Rate "high" when the finding is clearly visible and unambiguous; "medium" when partially limited by technique or artifact; "low" when image quality or field of view significantly limits assessment. Include a short note in low_confidence_notes for each level rated medium or low."""
 
 
+def _parse_confidence_json(text: str) -> Dict[str, Any]:
+    """Parse a confidence JSON reply (optionally code-fenced) into the normalized confidence dict."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = _CODE_FENCE_HEAD_RE.sub("", text)
+        text = _CODE_FENCE_TAIL_RE.sub("", text)
+    data = _json_loads(text)
+    level_confidence = {}
+    for level in DISC_LEVELS:
+        level_confidence[level] = (data.get("level_confidence") or {}).get(level) or "medium"
+        if level_confidence[level] not in ("high", "medium", "low"):
+            level_confidence[level] = "medium"
+    return {
+        "overall_confidence": data.get("overall_confidence") or "medium",
+        "level_confidence": level_confidence,
+        "low_confidence_notes": data.get("low_confidence_notes") or [],
+    }
+
+
+def _split_confidence_block(text: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Strip the trailing <!--CONFIDENCE-->...<!--/CONFIDENCE--> block from a report.
+
+    Returns:
+        (report text without the block, parsed confidence dict or {} if absent/invalid).
+    """
+    match = _CONFIDENCE_BLOCK_RE.search(text)
+    if not match:
+        return text, {}
+    report = (text[:match.start()] + text[match.end():]).strip()
+    try:
+        return report, _parse_confidence_json(match.group(1))
+    except Exception:
+        return report, {}
+
+
+CONFIDENCE_MAX_REPORT_CHARS = 12000
+
+
 def get_confidence_scores(report_text: str) -> Dict[str, Any]:
     """
     Ask Claude to review the generated report and return confidence scores per level.
+    Only needed when the report reply did not include its own confidence block.
     Returns a dict with overall_confidence, level_confidence (L1-L2 through L5-S1), and low_confidence_notes.
     On failure returns empty dict so frontend can still show report.
     """
     if not report_text or not report_text.strip():
         return {}
+    # Only copy when the report actually exceeds the limit
+    if len(report_text) > CONFIDENCE_MAX_REPORT_CHARS:
+        report_text = report_text[:CONFIDENCE_MAX_REPORT_CHARS]
     try:
         client = _get_client()
         model = os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-5")
@@ -310,28 +509,10 @@ def get_confidence_scores(report_text: str) -> Dict[str, Any]:
             system=CONFIDENCE_SYSTEM_PROMPT,
             messages=[{
                 "role": "user",
-                "content": f"Review the report you just generated. For each finding, rate your confidence level (high/medium/low) based on image quality and clarity of the pathology. Return as JSON.\n\nReport:\n{report_text[:12000]}",
+                "content": f"Review the report you just generated. For each finding, rate your confidence level (high/medium/low) based on image quality and clarity of the pathology. Return as JSON.\n\nReport:\n{report_text}",
             }],
         )
-        text = ""
-        for block in response.content:
-            if hasattr(block, "text"):
-                text += block.text
-        text = text.strip()
-        if text.startswith("```"):
-            text = re.sub(r"^```(?:json)?\s*", "", text)
-            text = re.sub(r"\s*```\s*$", "", text)
-        data = json.loads(text)
-        level_confidence = {}
-        for level in DISC_LEVELS:
-            level_confidence[level] = (data.get("level_confidence") or {}).get(level) or "medium"
-            if level_confidence[level] not in ("high", "medium", "low"):
-                level_confidence[level] = "medium"
-        return {
-            "overall_confidence": data.get("overall_confidence") or "medium",
-            "level_confidence": level_confidence,
-            "low_confidence_notes": data.get("low_confidence_notes") or [],
-        }
+        return _parse_confidence_json(_response_text(response))
     except Exception:
         return {}
 
@@ -339,35 +520,30 @@ def get_confidence_scores(report_text: str) -> Dict[str, Any]:
 def parse_report_to_findings(report_text: str) -> Dict[str, Any]:
     """
     Parse Claude's report into structured data. Handles various report formats.
+    An embedded confidence block is removed from the text and parsed separately.
 
     Args:
         report_text: Raw report string (PACS-style or FINDINGS/IMPRESSION).
 
     Returns:
         Dict with keys: findings (str), impression (str), level_findings (dict),
-        clinical_indication (str), technique (str), raw (str).
+        clinical_indication (str), technique (str), raw (str, without the
+        confidence block), confidence (dict, empty if the reply had none).
     """
-    raw = report_text if isinstance(report_text, str) else ""
+    raw, confidence = _split_confidence_block(report_text if isinstance(report_text, str) else "")
     findings = ""
     impression = ""
 
     # Try multiple patterns for IMPRESSION (often at end)
-    for imp_pattern in [
-        r"\bIMPRESSION\s*:?\s*\n([\s\S]*)",
-        r"\bIMPRESSION\s*:?\s*([\s\S]*)",
-        r"\bCONCLUSION\s*:?\s*\n([\s\S]*)",
-    ]:
-        imp_match = re.search(imp_pattern, raw, re.IGNORECASE)
+    for imp_re in _IMPRESSION_RES:
+        imp_match = imp_re.search(raw)
         if imp_match:
             impression = imp_match.group(1).strip()
             break
 
     # FINDINGS: stop at IMPRESSION, CONCLUSION, or end
-    for find_pattern in [
-        r"\bFINDINGS\s*:?\s*\n([\s\S]*?)(?=\n\s*IMPRESSION\b|\n\s*CONCLUSION\b|\Z)",
-        r"\bFINDINGS\s*:?\s*([\s\S]*?)(?=IMPRESSION|CONCLUSION|\Z)",
-    ]:
-        find_match = re.search(find_pattern, raw, re.IGNORECASE)
+    for find_re in _FINDINGS_RES:
+        find_match = find_re.search(raw)
         if find_match:
             findings = find_match.group(1).strip()
             break
@@ -390,6 +566,7 @@ def parse_report_to_findings(report_text: str) -> Dict[str, Any]:
         "technique": technique,
         "comparison": comparison,
         "raw": raw,
+        "confidence": confidence,
     }
 
 
@@ -410,16 +587,18 @@ def validate_report(report_text: str, structured: Dict[str, Any]) -> Dict[str, A
     report_upper = (report_text or "").upper()
     level_checks: Dict[str, bool] = {}
 
-    for level in DISC_LEVELS:
-        # Check in raw text or in level_findings
-        in_text = level.upper() in report_upper or level.replace("-", "/") in report_upper
-        level_data = (structured.get("level_findings") or {}).get(level, "")
+    level_findings = structured.get("level_findings") or {}
+
+    for level, slash in zip(DISC_LEVELS, _DISC_LEVELS_SLASH):
+        # Check in raw text or in level_findings (DISC_LEVELS are already uppercase)
+        in_text = level in report_upper or slash in report_upper
+        level_data = level_findings.get(level, "")
         level_checks[level] = in_text or bool(level_data and level_data.strip())
         if not level_checks[level]:
             warnings.append(f"Disc level {level} not explicitly mentioned.")
 
     has_impression = bool(
-        re.search(r"\bIMPRESSION\b", report_text or "", re.IGNORECASE)
+        _IMPRESSION_WORD_RE.search(report_text or "")
         and (structured.get("impression") or "").strip()
     )
     if not has_impression:
@@ -438,10 +617,27 @@ def validate_report(report_text: str, structured: Dict[str, Any]) -> Dict[str, A
     }
 
 
-def run_analysis(study_dir: str) -> Dict[str, Any]:
+def _error_result(error: str) -> Dict[str, Any]:
+    return {"success": False, "report": "", "structured": {}, "error": error}
+
+
+def _success_result(structured: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a parsed report (confidence already filled in) and wrap it as a successful result."""
+    report_text = structured["raw"]
+    structured["validation"] = validate_report(report_text, structured)
+    return {
+        "success": True,
+        "report": report_text,
+        "structured": structured,
+        "error": None,
+    }
+
+
+async def run_analysis_async(study_dir: str) -> Dict[str, Any]:
     """
     Run full AI analysis for a study: extract T2 sagittal slices, convert to PNG,
-    call Claude, and return structured result.
+    call Claude, and return structured result. DICOM work runs in worker threads and
+    the report request uses AsyncAnthropic, so several studies can run concurrently.
 
     Args:
         study_dir: Path to uploads/{study_id}.
@@ -450,45 +646,22 @@ def run_analysis(study_dir: str) -> Dict[str, Any]:
         Dict with: success (bool), report (str), structured (dict), error (str if failed).
     """
     try:
-        slice_paths = get_sagittal_t2_slice_paths(study_dir)
+        slice_paths = await asyncio.to_thread(get_sagittal_t2_slice_paths, study_dir)
         if not slice_paths:
-            return {
-                "success": False,
-                "report": "",
-                "structured": {},
-                "error": "No sagittal T2 slices found in study.",
-            }
-
-        images_b64 = []
-        for path in slice_paths:
-            try:
-                images_b64.append(dicom_to_png_base64(path))
-            except Exception as e:
-                return {
-                    "success": False,
-                    "report": "",
-                    "structured": {},
-                    "error": f"Failed to convert DICOM to image: {e!s}",
-                }
-
-        report_text = analyze_with_claude(images_b64)
-        structured = parse_report_to_findings(report_text)
-        confidence = get_confidence_scores(report_text)
-        structured["confidence"] = confidence
-        validation = validate_report(report_text, structured)
-        structured["validation"] = validation
-        return {
-            "success": True,
-            "report": report_text,
-            "structured": structured,
-            "error": None,
-        }
+            return _error_result("No sagittal T2 slices found in study.")
+
+        try:
+            images_b64 = await asyncio.gather(
+                *(asyncio.to_thread(dicom_to_png_base64, path) for path in slice_paths)
+            )
+        except Exception as e:
+            return _error_result(f"Failed to convert DICOM to image: {e!s}")
+
+        structured = parse_report_to_findings(await analyze_with_claude_async(images_b64))
+        if not structured["confidence"]:
+            structured["confidence"] = await asyncio.to_thread(get_confidence_scores, structured["raw"])
+        return _success_result(structured)
     except ValueError as e:
-        return {"success": False, "report": "", "structured": {}, "error": str(e)}
+        return _error_result(str(e))
     except Exception as e:
-        return {
-            "success": False,
-            "report": "",
-            "structured": {},
-            "error": f"Analysis failed: {e!s}",
-        }
+        return _error_result(f"Analysis failed: {e!s}")
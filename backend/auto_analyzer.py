@@ -1,16 +1,18 @@
 """
-Automatic AI analysis service: polls the database for studies with status="received",
-runs AI analysis (ai_analyzer.run_analysis), saves the report, and sets status to "analyzed".
+Automatic AI analysis service: picks up studies with status="received",
+runs AI analysis (ai_analyzer.run_analysis_async), saves the report, and sets status to "analyzed".
 
 Run as a background service alongside the API and Orthanc monitor:
   python auto_analyzer.py
 
-Poll interval: 30 seconds (configurable via AUTO_ANALYZER_INTERVAL_SEC).
+Wakes as soon as a study is recorded as received (see notify.py); otherwise
+re-checks the database every 30 seconds (configurable via AUTO_ANALYZER_INTERVAL_SEC).
+Up to 3 studies are analyzed concurrently (configurable via AUTO_ANALYZER_CONCURRENCY).
 """
 
 import os
 import sys
-import time
+import asyncio
 import logging
 from pathlib import Path
 
@@ -26,8 +28,9 @@ try:
 except ImportError:
     pass
 
-from database import get_studies_by_status, update_study_status, save_report
-from ai_analyzer import run_analysis
+from database import get_received_study_ids, update_study_status, save_report
+from ai_analyzer import run_analysis_async
+import notify
 
 # Logging
 logging.basicConfig(
@@ -39,9 +42,10 @@ logger = logging.getLogger("auto_analyzer")
 
 UPLOADS_DIR = Path(__file__).resolve().parent / "uploads"
 POLL_INTERVAL_SEC = int(os.environ.get("AUTO_ANALYZER_INTERVAL_SEC", "30"))
+CONCURRENCY = max(1, int(os.environ.get("AUTO_ANALYZER_CONCURRENCY", "3")))
 
 
-def process_one_study(study_id: str) -> bool:
+async def process_one_study(study_id: str) -> bool:
     """
     Run AI analysis for one study. Save report and set status to "analyzed" on success;
     set status to "error" with message on failure.
@@ -54,7 +58,7 @@ def process_one_study(study_id: str) -> bool:
 
     logger.info("Analyzing study %s ...", study_id)
     try:
-        result = run_analysis(str(study_dir))
+        result = await run_analysis_async(str(study_dir))
     except Exception as e:
         logger.exception("Analysis raised for %s: %s", study_id, e)
         update_study_status(study_id, "error", error_message=str(e))
@@ -83,34 +87,35 @@ def process_one_study(study_id: str) -> bool:
     return True
 
 
-def run_loop():
-    """Poll for received studies and process them one at a time."""
+async def run_loop():
+    """Process received studies in batches of CONCURRENCY, waking on new-study signals or the poll interval."""
     key_set = bool(os.environ.get("ANTHROPIC_API_KEY") and os.environ.get("ANTHROPIC_API_KEY", "").strip() not in ("", "your_key_here"))
-    logger.info("Auto-analyzer started (interval=%ss). ANTHROPIC_API_KEY set=%s. Watching for status='received'.",
-                POLL_INTERVAL_SEC, key_set)
+    logger.info("Auto-analyzer started (interval=%ss, concurrency=%s). ANTHROPIC_API_KEY set=%s. Watching for status='received'.",
+                POLL_INTERVAL_SEC, CONCURRENCY, key_set)
     if not key_set:
         logger.warning("ANTHROPIC_API_KEY missing or placeholder. Analysis will fail until .env is configured.")
     while True:
+        drained = True
         try:
-            studies = get_studies_by_status("received")
-            if studies:
-                # Process one per cycle to avoid overloading API and allow other services to run
-                row = studies[0]
-                study_id = row.get("study_id")
-                if study_id:
-                    process_one_study(study_id)
+            # Bounded batch per cycle to stay within API rate limits and leave room for other services
+            study_ids = get_received_study_ids(CONCURRENCY)
+            if study_ids:
+                processed = await asyncio.gather(*(process_one_study(study_id) for study_id in study_ids))
+                drained = len(study_ids) < CONCURRENCY or not all(processed)
             else:
                 logger.debug("No studies with status=received.")
         except Exception as e:
             logger.exception("Poll/process error: %s", e)
-        time.sleep(POLL_INTERVAL_SEC)
+        if drained:
+            # Backlog drained (or a study was skipped): wait for the next study instead of re-polling
+            await notify.wait_for_study_received(POLL_INTERVAL_SEC)
 
 
 def main():
     if not UPLOADS_DIR.is_dir():
         logger.error("Uploads directory not found: %s", UPLOADS_DIR)
         sys.exit(1)
-    run_loop()
+    asyncio.run(run_loop())
 
 
 if __name__ == "__main__":
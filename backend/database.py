@@ -3,15 +3,47 @@ SQLite database for Spine AI: studies and reports from Orthanc and manual upload
 """
 import sqlite3
 import json
+import threading
 from pathlib import Path
 
+import notify
+
+# orjson serializes faster; fall back to stdlib json if it isn't installed
+try:
+    import orjson
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 DATABASE_PATH = Path(__file__).resolve().parent / "spine_studies.db"
 
+_LOCAL = threading.local()
+
+
+def _conn():
+    """
+    Return this thread's connection, opening it on first use.
+    Autocommit mode; WAL lets readers (API) proceed while the analyzer writes.
+    """
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(str(DATABASE_PATH), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.row_factory = sqlite3.Row
+        _LOCAL.conn = conn
+    return conn
+
 
 def init_database():
     """Initialize database with tables."""
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    cursor = conn.cursor()
+    cursor = _conn().cursor()
 
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS studies (
@@ -44,14 +76,24 @@ def init_database():
         )
     """)
 
-    conn.commit()
-    conn.close()
+    # Orthanc studies whose ingest failed and must be retried (see orthanc_monitor)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS orthanc_retries (
+            study_id TEXT PRIMARY KEY,
+            attempts INTEGER NOT NULL,
+            next_attempt_at TIMESTAMP NOT NULL,
+            last_error TEXT
+        )
+    """)
+
+    # Status polling (auto analyzer, worklist) and latest-report lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_studies_status_received ON studies(status, received_at DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_study_created ON reports(study_id, created_at DESC)")
 
 
 def insert_study(study_data):
     """Insert new study into database."""
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    cursor = conn.cursor()
+    cursor = _conn().cursor()
 
     cursor.execute("""
         INSERT OR IGNORE INTO studies
@@ -69,32 +111,82 @@ def insert_study(study_data):
         study_data.get("image_count", 0),
         "received",
     ))
-
-    conn.commit()
-    conn.close()
+    if cursor.rowcount > 0:
+        notify.signal_study_received()
 
 
 def get_studies_by_status(status):
     """Get all studies with given status."""
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    cursor = conn.cursor()
+    cursor = _conn().cursor()
 
     cursor.execute(
         "SELECT * FROM studies WHERE status = ? ORDER BY received_at DESC",
         (status,),
     )
 
-    columns = [d[0] for d in cursor.description]
-    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def get_received_study_ids(limit):
+    """Return up to `limit` study_ids awaiting analysis, most recently received first."""
+    rows = _conn().execute(
+        "SELECT study_id FROM studies WHERE status = 'received' ORDER BY received_at DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def get_existing_study_ids(study_ids):
+    """Return the subset of study_ids that are already recorded in the studies table."""
+    study_ids = list(study_ids)
+    if not study_ids:
+        return set()
+    placeholders = ",".join("?" * len(study_ids))
+    rows = _conn().execute(
+        f"SELECT study_id FROM studies WHERE study_id IN ({placeholders})", study_ids
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def record_orthanc_retry(study_id, error, base_delay_sec, max_delay_sec):
+    """
+    Record a failed Orthanc ingest and schedule the next attempt with exponential backoff
+    (base_delay_sec doubling per attempt, capped at max_delay_sec). Returns the delay in seconds.
+    """
+    conn = _conn()
+    row = conn.execute("SELECT attempts FROM orthanc_retries WHERE study_id = ?", (study_id,)).fetchone()
+    attempts = (row[0] if row else 0) + 1
+    delay = min(base_delay_sec * 2 ** (attempts - 1), max_delay_sec)
+    conn.execute(
+        """INSERT OR REPLACE INTO orthanc_retries (study_id, attempts, next_attempt_at, last_error)
+           VALUES (?, ?, datetime('now', ?), ?)""",
+        (study_id, attempts, f"+{int(delay)} seconds", error),
+    )
+    return delay
+
 
-    conn.close()
-    return results
+def get_due_orthanc_retries(limit):
+    """Return up to `limit` study_ids whose next Orthanc ingest attempt is due, oldest first."""
+    rows = _conn().execute(
+        """SELECT study_id FROM orthanc_retries WHERE next_attempt_at <= datetime('now')
+           ORDER BY next_attempt_at LIMIT ?""",
+        (limit,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def clear_orthanc_retries(study_ids):
+    """Forget pending retries for study_ids (ingested, skipped, or gone from Orthanc)."""
+    study_ids = list(study_ids)
+    if not study_ids:
+        return
+    placeholders = ",".join("?" * len(study_ids))
+    _conn().execute(f"DELETE FROM orthanc_retries WHERE study_id IN ({placeholders})", study_ids)
 
 
 def update_study_status(study_id, status, error_message=None):
     """Update study status."""
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    cursor = conn.cursor()
+    cursor = _conn().cursor()
 
     if status == "analyzed":
         cursor.execute("""
@@ -108,15 +200,13 @@ def update_study_status(study_id, status, error_message=None):
             SET status = ?, error_message = ?
             WHERE study_id = ?
         """, (status, error_message, study_id))
-
-    conn.commit()
-    conn.close()
+    if status == "received":
+        notify.signal_study_received()
 
 
 def save_report(study_id, ai_report_text, ai_report_json=None, confidence_score=None):
     """Save AI-generated report."""
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    cursor = conn.cursor()
+    cursor = _conn().cursor()
 
     cursor.execute("""
         INSERT INTO reports (study_id, ai_report_text, ai_report_json, confidence_score)
@@ -124,30 +214,25 @@ def save_report(study_id, ai_report_text, ai_report_json=None, confidence_score=
     """, (
         study_id,
         ai_report_text,
-        json.dumps(ai_report_json) if ai_report_json else None,
+        _json_dumps(ai_report_json) if ai_report_json else None,
         confidence_score,
     ))
 
-    conn.commit()
-    conn.close()
-
 
 def get_report(study_id):
     """Get latest report for a study. Returns dict with ai_report_text, ai_report_json, etc. or None."""
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    cursor = conn.cursor()
+    cursor = _conn().cursor()
     cursor.execute(
         """SELECT ai_report_text, ai_report_json, final_report_text, confidence_score, created_at
            FROM reports WHERE study_id = ? ORDER BY created_at DESC LIMIT 1""",
         (study_id,),
     )
     row = cursor.fetchone()
-    conn.close()
     if not row:
         return None
     text = row[0]
     try:
-        report_json = json.loads(row[1]) if row[1] else None
+        report_json = _json_loads(row[1]) if row[1] else None
     except (TypeError, json.JSONDecodeError):
         report_json = None
     return {
@@ -1,31 +1,144 @@
 import pydicom
-from typing import List, Dict, Any
-from collections import defaultdict
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from operator import itemgetter
+import multiprocessing
 import os
+import re
+import threading
+
+# Below this many files, process start-up and pickling cost more than they save
+PARALLEL_MIN_FILES = 16
+
+# Images listed per series in the metadata (limit for response size); count still covers all
+MAX_IMAGES_PER_SERIES = 10
+
+# Sequence keywords in priority order: when several appear, the earlier one wins
+_SEQUENCE_PRIORITY = ("T1", "T2", "STIR", "FLAIR")
+_SEQUENCE_RE = re.compile("|".join(_SEQUENCE_PRIORITY))
+# Display order of series in the metadata (unlisted types sort last)
+_SEQ_ORDER = {"T1": 1, "T2": 2, "STIR": 3, "FLAIR": 4, "Other": 5, "Unknown": 6}
+
+# Integer tags for direct Dataset lookups (skips pydicom's keyword resolution in __getattr__)
+_TAG_PATIENT_NAME = 0x00100010
+_TAG_STUDY_DATE = 0x00080020
+_TAG_STUDY_DESC = 0x00081030
+_TAG_SERIES_DESC = 0x0008103E
+_TAG_SEQ_NAME = 0x00180024
+_TAG_SLICE_LOC = 0x00201041
+_TAG_IPP = 0x00200032
+_TAG_SERIES_NUM = 0x00200011
+
+# The only elements extract_study_metadata reads; everything else is skipped while parsing
+_META_TAGS = [
+    _TAG_PATIENT_NAME, _TAG_STUDY_DATE, _TAG_STUDY_DESC, _TAG_SERIES_DESC,
+    _TAG_SEQ_NAME, _TAG_SLICE_LOC, _TAG_IPP, _TAG_SERIES_NUM,
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared worker pool, creating it on first use (callers may be on several threads).
+    Workers are spawned, not forked: the API process is multi-threaded, and a fork could copy
+    locks held by other threads. Workers only need pydicom.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool (e.g. a worker was OOM-killed) so the next call builds a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+def _read_header(file_path: str) -> pydicom.Dataset:
+    """Read the metadata elements of one DICOM file (no pixel data). Runs in worker processes."""
+    return pydicom.dcmread(file_path, specific_tags=_META_TAGS, stop_before_pixels=True)
+
+def _sequence_keyword(text: str) -> Optional[str]:
+    """Highest-priority sequence keyword found anywhere in text (case-insensitive), or None."""
+    found = set(_SEQUENCE_RE.findall(text.upper()))
+    return next((seq for seq in _SEQUENCE_PRIORITY if seq in found), None)
+
+@lru_cache(maxsize=256)
+def _sequence_type(series_description: Optional[str], sequence_name: Optional[str]) -> str:
+    """
+    Classify a series from SeriesDescription / SequenceName (None when the tag is absent).
+    Cached because every slice of a series carries the same strings.
+    """
+    sequence_type = "Unknown"
+    if series_description is not None:
+        sequence_type = _sequence_keyword(series_description) or "Other"
+    if sequence_name is not None:
+        # SequenceName overrides for T1/T2/STIR only
+        seq = _sequence_keyword(sequence_name)
+        if seq in ("T1", "T2", "STIR"):
+            sequence_type = seq
+    return sequence_type
+
+def _build_image_info(ds: pydicom.Dataset, idx: int) -> Dict[str, Any]:
+    """Per-image metadata (instance number, slice location, position) for one dataset."""
+    image_info = {
+        "instance_number": idx + 1,
+        "slice_location": None,
+        "image_position": None
+    }
+    
+    el = ds.get(_TAG_SLICE_LOC)
+    if el is not None:
+        try:
+            image_info["slice_location"] = float(el.value)
+        except:
+            pass
+    
+    el = ds.get(_TAG_IPP)
+    if el is not None:
+        try:
+            image_info["image_position"] = [float(x) for x in el.value]
+        except:
+            pass
+    
+    return image_info
 
 def process_dicom_files(file_paths: List[str]) -> List[pydicom.Dataset]:
     """
-    Process multiple DICOM files and return a list of DICOM datasets
+    Process multiple DICOM files and return a list of DICOM datasets holding only the
+    elements used by extract_study_metadata. Large studies are read in parallel worker
+    processes; if the pool has broken, it is replaced and this call reads serially.
     
     Args:
         file_paths: List of paths to DICOM files
         
     Returns:
-        List of pydicom Dataset objects
+        List of pydicom Dataset objects, in the same order as file_paths
+        
+    Raises:
+        FileNotFoundError: if any path does not exist (checked for all files before reading)
+        pydicom.errors.InvalidDicomError: if a file is not valid DICOM (pydicom errors propagate unchanged)
     """
-    dicom_datasets = []
+    missing = [file_path for file_path in file_paths if not os.path.exists(file_path)]
+    if missing:
+        raise FileNotFoundError(f"DICOM file not found: {missing[0]}")
     
-    for file_path in file_paths:
+    if len(file_paths) >= PARALLEL_MIN_FILES:
+        pool = _get_pool()
         try:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"DICOM file not found: {file_path}")
-            
-            ds = pydicom.dcmread(file_path)
-            dicom_datasets.append(ds)
-        except Exception as e:
-            raise ValueError(f"Error reading DICOM file {file_path}: {str(e)}")
-    
-    return dicom_datasets
+            return list(pool.map(_read_header, file_paths, chunksize=8))
+        except BrokenProcessPool:
+            _discard_pool(pool)
+    return [_read_header(file_path) for file_path in file_paths]
 
 def extract_study_metadata(dicom_datasets: List[pydicom.Dataset]) -> Dict[str, Any]:
     """
@@ -50,117 +163,74 @@ def extract_study_metadata(dicom_datasets: List[pydicom.Dataset]) -> Dict[str, A
     
     # Extract patient name (handle both string and PersonName types)
     patient_name = "Unknown"
-    if hasattr(first_ds, 'PatientName'):
-        if hasattr(first_ds.PatientName, 'given_name') or hasattr(first_ds.PatientName, 'family_name'):
-            # PersonName object
-            try:
-                patient_name = str(first_ds.PatientName)
-            except:
-                patient_name = "Unknown"
-        else:
-            patient_name = str(first_ds.PatientName)
+    el = first_ds.get(_TAG_PATIENT_NAME)
+    if el is not None:
+        try:
+            patient_name = str(el.value)
+        except:
+            patient_name = "Unknown"
     
     # Extract study date
     study_date = "Unknown"
-    if hasattr(first_ds, 'StudyDate'):
-        study_date = str(first_ds.StudyDate)
+    el = first_ds.get(_TAG_STUDY_DATE)
+    if el is not None:
+        study_date = str(el.value)
     
     # Extract study description
     study_description = "Unknown"
-    if hasattr(first_ds, 'StudyDescription'):
-        study_description = str(first_ds.StudyDescription)
+    el = first_ds.get(_TAG_STUDY_DESC)
+    if el is not None:
+        study_description = str(el.value)
     
     # Organize by sequence type
-    series_dict = defaultdict(lambda: {
-        "sequence_type": "Unknown",
-        "description": "Unknown",
-        "count": 0,
-        "images": []
-    })
+    series_dict = {}
     
     for idx, ds in enumerate(dicom_datasets):
         # Determine sequence type from SeriesDescription or SequenceName
-        sequence_type = "Unknown"
-        series_description = "Unknown"
-        
-        if hasattr(ds, 'SeriesDescription'):
-            series_description = str(ds.SeriesDescription)
-            # Try to identify sequence type
-            desc_upper = series_description.upper()
-            if 'T1' in desc_upper:
-                sequence_type = "T1"
-            elif 'T2' in desc_upper:
-                sequence_type = "T2"
-            elif 'STIR' in desc_upper:
-                sequence_type = "STIR"
-            elif 'FLAIR' in desc_upper:
-                sequence_type = "FLAIR"
-            else:
-                sequence_type = "Other"
-        
-        if hasattr(ds, 'SequenceName'):
-            seq_name = str(ds.SequenceName).upper()
-            if 'T1' in seq_name:
-                sequence_type = "T1"
-            elif 'T2' in seq_name:
-                sequence_type = "T2"
-            elif 'STIR' in seq_name:
-                sequence_type = "STIR"
+        el = ds.get(_TAG_SERIES_DESC)
+        series_description = str(el.value) if el is not None else None
+        el = ds.get(_TAG_SEQ_NAME)
+        sequence_name = str(el.value) if el is not None else None
+        sequence_type = _sequence_type(series_description, sequence_name)
+        if series_description is None:
+            series_description = "Unknown"
         
         # Get series number for grouping
         series_number = 0
-        if hasattr(ds, 'SeriesNumber'):
+        el = ds.get(_TAG_SERIES_NUM)
+        if el is not None:
             try:
-                series_number = int(ds.SeriesNumber)
+                series_number = int(el.value)
             except:
                 series_number = idx
         
         series_key = f"{sequence_type}_{series_number}"
         
-        if series_key not in series_dict:
-            series_dict[series_key] = {
+        entry = series_dict.get(series_key)
+        if entry is None:
+            entry = {
                 "sequence_type": sequence_type,
                 "description": series_description,
                 "count": 0,
-                "images": []
+                "images": [],
+                "_order": _SEQ_ORDER.get(sequence_type, 99)
             }
+            series_dict[series_key] = entry
         
-        # Extract image metadata
-        image_info = {
-            "instance_number": idx + 1,
-            "slice_location": None,
-            "image_position": None
-        }
-        
-        if hasattr(ds, 'SliceLocation'):
-            try:
-                image_info["slice_location"] = float(ds.SliceLocation)
-            except:
-                pass
-        
-        if hasattr(ds, 'ImagePositionPatient'):
-            try:
-                image_info["image_position"] = [float(x) for x in ds.ImagePositionPatient]
-            except:
-                pass
-        
-        series_dict[series_key]["images"].append(image_info)
-        series_dict[series_key]["count"] += 1
+        entry["count"] += 1
+        if len(entry["images"]) < MAX_IMAGES_PER_SERIES:
+            entry["images"].append(_build_image_info(ds, idx))
     
-    # Convert to list format
+    # Sort series by sequence type (order key precomputed per entry; sort is stable) and convert to list format
     series_list = []
-    for key, value in series_dict.items():
+    for value in sorted(series_dict.values(), key=itemgetter("_order")):
         series_list.append({
             "sequence_type": value["sequence_type"],
             "description": value["description"],
             "image_count": value["count"],
-            "images": value["images"][:10]  # Limit to first 10 for response size
+            "images": value["images"]
         })
     
-    # Sort series by sequence type
-    sequence_order = {"T1": 1, "T2": 2, "STIR": 3, "FLAIR": 4, "Other": 5, "Unknown": 6}
-    series_list.sort(key=lambda x: sequence_order.get(x["sequence_type"], 99))
-    
     return {
         "patient_name": patient_name,
         "study_date": study_date,
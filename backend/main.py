@@ -1,4 +1,8 @@
 import os
+import asyncio
+import shutil
+import stat
+from functools import lru_cache
 from pathlib import Path
 try:
     from dotenv import load_dotenv
@@ -6,14 +10,19 @@ try:
 except ImportError:
     pass
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import uuid
 
+import aiofiles
+from pydicom.errors import InvalidDicomError
+from streaming_form_data import ParseFailedException, StreamingFormDataParser
+from streaming_form_data.targets import BaseTarget
+
 from dicom_processor import process_dicom_files, extract_study_metadata
-from ai_analyzer import run_analysis
+from ai_analyzer import run_analysis_async
 from database import get_studies_by_status, update_study_status, get_report
 
 app = FastAPI(title="Spine MRI Analysis API")
@@ -22,6 +31,14 @@ app = FastAPI(title="Spine MRI Analysis API")
 UPLOADS_DIR = Path(__file__).resolve().parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+# DICOM Part 10 files: 128-byte preamble followed by the "DICM" magic
+DICOM_PREAMBLE_LEN = 128
+DICOM_MAGIC = b"DICM"
+DICOM_HEADER_LEN = DICOM_PREAMBLE_LEN + len(DICOM_MAGIC)
+
+# Study images never change once written (new uploads get a new study_id), so browsers may reuse them
+IMAGE_CACHE_CONTROL = "private, max-age=3600"
+
 # Configure CORS (include common Vite dev ports)
 app.add_middleware(
     CORSMiddleware,
@@ -51,55 +68,168 @@ async def health_check():
     return {"status": "healthy", "message": "Spine MRI Analysis API is running"}
 
 
-@app.post("/upload-dicom")
-async def upload_dicom(files: List[UploadFile] = File(...)):
+class _RejectedUpload(Exception):
+    """Raised mid-stream when an uploaded part is not a DICOM file (message is the 400 detail)."""
+
+
+class _DicomFilesTarget(BaseTarget):
     """
-    Upload and process DICOM files. Saves files under uploads/{study_id}/ and returns
-    study_id and metadata. Use study_id for viewing images and running AI analysis.
+    Streaming multipart target: writes each part of the "files" field to {study_path}/{i}.dcm as it
+    arrives. A part is rejected (_RejectedUpload) as soon as its name lacks .dcm or its first 132 bytes
+    lack the DICM magic; nothing of it is written to disk before that check passes.
     """
-    if not files:
-        raise HTTPException(status_code=400, detail="No files provided")
 
-    for file in files:
-        if not file.filename.lower().endswith(".dcm"):
-            raise HTTPException(
-                status_code=400,
-                detail=f"File {file.filename} is not a DICOM file (.dcm extension required)",
+    def __init__(self, study_path: Path):
+        super().__init__()
+        self.study_path = study_path
+        self.paths: List[str] = []
+        self.filenames: List[str] = []
+        self._fd = None
+        self._head = bytearray()
+        # True between a part's start and its closing boundary
+        self.part_open = False
+
+    # Async hooks (driven by parser.adata_received) so disk writes don't block the event loop
+    async def on_start_async(self):
+        filename = self.multipart_filename or ""
+        if not filename.lower().endswith(".dcm"):
+            raise _RejectedUpload(f"File {filename} is not a DICOM file (.dcm extension required)")
+        self.paths.append(str(self.study_path / f"{len(self.paths)}.dcm"))
+        self.filenames.append(filename)
+        self._head = bytearray()
+        self.part_open = True
+
+    async def on_data_received_async(self, chunk: bytes):
+        if self._fd is None:
+            # Hold the part in memory until the DICOM header can be checked
+            self._head += chunk
+            if len(self._head) < DICOM_HEADER_LEN:
+                return
+            await self._open_checked()
+        else:
+            await self._fd.write(chunk)
+
+    async def on_finish_async(self):
+        if self._fd is None:
+            await self._open_checked()  # part shorter than the header: always rejected
+        self.part_open = False
+        await self.aclose()
+
+    async def _open_checked(self):
+        if self._head[DICOM_PREAMBLE_LEN:DICOM_HEADER_LEN] != DICOM_MAGIC:
+            raise _RejectedUpload(
+                f"File {self.filenames[-1]} is not a DICOM file (missing DICM header)"
             )
+        self._fd = await aiofiles.open(self.paths[-1], "wb")
+        await self._fd.write(self._head)
+        self._head = bytearray()
+
+    async def aclose(self):
+        if self._fd is not None:
+            await self._fd.close()
+            self._fd = None
+
+
+def _remove_study_dir(study_path: Path):
+    """Delete a partially written upload directory, ignoring errors."""
+    if study_path.exists():
+        try:
+            shutil.rmtree(study_path)
+        except OSError:
+            pass
+        _study_image_file.cache_clear()
+
+
+def _image_ids(study_id: str, count: int) -> List[str]:
+    """Relative viewer URLs for images 0..count-1 of a study."""
+    prefix = f"/api/study/{study_id}/image/"
+    return [prefix + str(i) for i in range(count)]
+
+
+# upload_dicom parses the raw request stream, so describe its multipart body for /docs explicitly
+_UPLOAD_DICOM_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                            "description": "DICOM files (.dcm)",
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
 
+@app.post("/upload-dicom", openapi_extra=_UPLOAD_DICOM_OPENAPI)
+async def upload_dicom(request: Request):
+    """
+    Upload and process DICOM files (multipart field "files"). The request body is streamed
+    straight to uploads/{study_id}/ without buffering whole files in memory. Returns
+    study_id and metadata. Use study_id for viewing images and running AI analysis.
+    """
     study_id = str(uuid.uuid4())
     study_path = UPLOADS_DIR / study_id
     study_path.mkdir(parents=True, exist_ok=True)
-    temp_files = []
+    target = _DicomFilesTarget(study_path)
 
     try:
-        for i, file in enumerate(files):
-            content = await file.read()
-            temp_path = study_path / f"{i}.dcm"
-            temp_path.write_bytes(content)
-            temp_files.append(str(temp_path))
+        parser = StreamingFormDataParser(headers=request.headers)
+        parser.register("files", target)
+        async for chunk in request.stream():
+            await parser.adata_received(chunk)
+    except _RejectedUpload as e:
+        await target.aclose()
+        _remove_study_dir(study_path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except ParseFailedException as e:
+        await target.aclose()
+        _remove_study_dir(study_path)
+        raise HTTPException(status_code=400, detail=f"Invalid multipart upload: {e}")
+    except Exception:
+        await target.aclose()
+        _remove_study_dir(study_path)
+        raise
+
+    # A body that ends before the closing boundary leaves the last part open and truncated
+    truncated = target.part_open
+    await target.aclose()
+    if truncated:
+        _remove_study_dir(study_path)
+        raise HTTPException(status_code=400, detail="Invalid multipart upload: body ended before the last file was complete")
 
-        dicom_data = process_dicom_files(temp_files)
+    if not target.paths:
+        _remove_study_dir(study_path)
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    try:
+        # Off the event loop: large studies block on the worker-process pool
+        dicom_data = await asyncio.to_thread(process_dicom_files, target.paths)
         metadata = extract_study_metadata(dicom_data)
 
         # Relative paths so the frontend can load images from same origin (e.g. via Vite proxy)
-        image_ids = [f"/api/study/{study_id}/image/{i}" for i in range(len(files))]
-        metadata["image_ids"] = image_ids
+        metadata["image_ids"] = _image_ids(study_id, len(target.paths))
         metadata["study_id"] = study_id
 
         return {
             "status": "success",
             "study_id": study_id,
-            "files_processed": len(files),
+            "files_processed": len(target.paths),
             "metadata": metadata,
         }
+    except InvalidDicomError as e:
+        _remove_study_dir(study_path)
+        raise HTTPException(status_code=400, detail=f"Invalid DICOM file: {str(e)}")
     except Exception as e:
-        import shutil
-        if study_path.exists():
-            try:
-                shutil.rmtree(study_path)
-            except OSError:
-                pass
+        _remove_study_dir(study_path)
         raise HTTPException(status_code=500, detail=f"Error processing DICOM files: {str(e)}")
 
 
@@ -110,19 +240,34 @@ def _safe_study_path(study_id: str) -> Path:
     return UPLOADS_DIR / study_id
 
 
-@app.get("/api/study/{study_id}/image/{image_index}")
-async def serve_study_image(study_id: str, image_index: int):
-    """Serve a single DICOM file for the viewer (by index 0, 1, 2, ...)."""
+@lru_cache(maxsize=4096)
+def _study_image_file(study_id: str, image_index: int) -> Tuple[Path, os.stat_result]:
+    """
+    Resolve and stat a study image once; viewers request every slice repeatedly while scrolling.
+    Misses raise 404 and are not cached (Orthanc studies may still be arriving).
+    """
     study_path = _safe_study_path(study_id)
     if not study_path.is_dir():
         raise HTTPException(status_code=404, detail="Study not found")
     file_path = study_path / f"{image_index}.dcm"
-    if not file_path.is_file():
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="Image not found")
+    return file_path, stat_result
+
+
+@app.get("/api/study/{study_id}/image/{image_index}")
+async def serve_study_image(study_id: str, image_index: int):
+    """Serve a single DICOM file for the viewer (by index 0, 1, 2, ...)."""
+    file_path, stat_result = _study_image_file(study_id, image_index)
     return FileResponse(
         file_path,
+        stat_result=stat_result,
         media_type="application/dicom",
-        headers={"Content-Disposition": "inline"},
+        headers={"Content-Disposition": "inline", "Cache-Control": IMAGE_CACHE_CONTROL},
     )
 
 
@@ -132,7 +277,7 @@ async def analyze_study(study_id: str):
     study_path = _safe_study_path(study_id)
     if not study_path.is_dir():
         raise HTTPException(status_code=404, detail="Study not found")
-    result = run_analysis(str(study_path))
+    result = await run_analysis_async(str(study_path))
     if not result["success"]:
         update_study_status(study_id, "error", error_message=result.get("error"))
         raise HTTPException(status_code=500, detail=result.get("error", "Analysis failed"))
@@ -0,0 +1,67 @@
+"""
+Wake-up signal for the auto analyzer when a study is recorded with status="received".
+
+Writers call signal_study_received(); the analyzer awaits wait_for_study_received()
+instead of sleeping for the full poll interval. Within one process this is a
+threading.Event. Writers in other processes (e.g. orthanc_monitor) touch a marker
+file whose mtime the waiter checks with a cheap stat, so no database query runs
+while idle. The wait is a coroutine (short asyncio sleeps), so cancelling it on
+shutdown is immediate.
+"""
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+MARKER_PATH = Path(__file__).resolve().parent / ".study_received"
+CHECK_INTERVAL_SEC = 0.25
+
+study_received = threading.Event()
+
+
+def _marker_mtime():
+    try:
+        return MARKER_PATH.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+_last_marker_mtime = _marker_mtime()
+
+
+def signal_study_received():
+    """Wake any waiter in this process and in other processes watching the marker file."""
+    study_received.set()
+    try:
+        MARKER_PATH.touch()
+    except OSError:
+        pass
+
+
+def _take_signal():
+    """Consume a pending in-process or marker-file signal; True if there was one."""
+    global _last_marker_mtime
+    if study_received.is_set():
+        study_received.clear()
+        _last_marker_mtime = _marker_mtime()
+        return True
+    mtime = _marker_mtime()
+    if mtime != _last_marker_mtime:
+        _last_marker_mtime = mtime
+        return True
+    return False
+
+
+async def wait_for_study_received(timeout):
+    """
+    Wait until a study is signaled or timeout seconds elapse, checking every CHECK_INTERVAL_SEC.
+    Returns True if woken by a signal, False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if _take_signal():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(CHECK_INTERVAL_SEC, remaining))
@@ -1,17 +1,31 @@
 """
-Orthanc monitoring service: polls Orthanc for new lumbar spine studies,
-downloads DICOMs into backend uploads, and records them in the database.
+Orthanc monitoring service: follows Orthanc's /changes feed for newly stable lumbar
+spine studies, downloads DICOMs into backend uploads, and records them in the database.
 Run alongside the FastAPI server for automatic DICOM reception from PACS.
+
+Only deltas since the last handled change sequence number are fetched; that number is
+persisted in CHANGES_SEQ_PATH so restarts resume where they left off. Studies that fail
+to ingest are recorded in the database and retried with backoff until they succeed or
+disappear from Orthanc, without holding up the feed. Study lookups run
+concurrently over one keep-alive httpx.AsyncClient; archive downloads run in parallel up
+to DOWNLOAD_CONCURRENCY at a time.
 """
 import os
-import time
+import asyncio
 import zipfile
 import shutil
+import tempfile
 from pathlib import Path
 
-import requests
+import httpx
 
-from database import insert_study
+from database import (
+    clear_orthanc_retries,
+    get_due_orthanc_retries,
+    get_existing_study_ids,
+    insert_study,
+    record_orthanc_retry,
+)
 
 # Orthanc connection (override with env if needed)
 ORTHANC_URL = os.environ.get("ORTHANC_URL", "http://localhost:8042")
@@ -22,32 +36,67 @@ ORTHANC_PASS = os.environ.get("ORTHANC_PASSWORD", "orthanc")
 UPLOADS_DIR = Path(__file__).resolve().parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+# Archives larger than this spill from memory to a temp file while downloading
+ARCHIVE_SPOOL_MAX_BYTES = 64 << 20
+# HTTP connections to Orthanc and simultaneous archive downloads
+MAX_CONNECTIONS = 16
+DOWNLOAD_CONCURRENCY = 4
+
+# Last Orthanc change sequence number handled
+CHANGES_SEQ_PATH = Path(__file__).resolve().parent / ".orthanc_changes_seq"
+# Changes fetched per /changes request, and pause between requests once the feed is drained
+CHANGES_BATCH_LIMIT = 100
+CHANGES_POLL_SEC = 2
+# Failed ingests are retried (persisted in the database) after RETRY_BASE_SEC, doubling per
+# attempt up to RETRY_MAX_SEC. Only a study that is gone from Orthanc (404) is dropped.
+RETRY_BASE_SEC = 30
+RETRY_MAX_SEC = 3600
+
+
+def load_last_change_seq():
+    """Return the persisted change sequence number (0 = replay Orthanc's whole change log)."""
+    try:
+        return int(CHANGES_SEQ_PATH.read_text().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+def save_last_change_seq(seq):
+    """Persist the change sequence number (atomically, so a crash never leaves a torn file)."""
+    tmp_path = CHANGES_SEQ_PATH.with_suffix(".tmp")
+    tmp_path.write_text(str(seq))
+    os.replace(tmp_path, CHANGES_SEQ_PATH)
+
 
-def get_orthanc_studies():
-    """Return list of study IDs in Orthanc."""
+async def get_orthanc_changes(client, since):
+    """Return one page of Orthanc's change log after `since` ({"Changes", "Done", "Last"}), or None."""
     try:
-        r = requests.get(
-            f"{ORTHANC_URL}/studies",
-            auth=(ORTHANC_USER, ORTHANC_PASS),
+        r = await client.get(
+            f"{ORTHANC_URL}/changes",
+            params={"since": since, "limit": CHANGES_BATCH_LIMIT},
             timeout=5,
         )
         r.raise_for_status()
         return r.json()
     except Exception as e:
         print(f"Error connecting to Orthanc: {e}")
-        return []
+        return None
+
 
+class StudyGone(Exception):
+    """The study no longer exists in Orthanc (404), so retrying is pointless."""
 
-def get_study_info(study_id):
-    """Return detailed info for a study."""
+
+async def get_study_info(client, study_id):
+    """Return detailed info for a study, or None on error. Raises StudyGone on 404."""
     try:
-        r = requests.get(
-            f"{ORTHANC_URL}/studies/{study_id}",
-            auth=(ORTHANC_USER, ORTHANC_PASS),
-            timeout=5,
-        )
+        r = await client.get(f"{ORTHANC_URL}/studies/{study_id}", timeout=5)
+        if r.status_code == 404:
+            raise StudyGone(study_id)
         r.raise_for_status()
         return r.json()
+    except StudyGone:
+        raise
     except Exception as e:
         print(f"Error getting study info: {e}")
         return None
@@ -65,108 +114,154 @@ def is_lumbar_spine_study(study_info):
     return False
 
 
-def download_study_dicoms(study_id, output_dir):
+def _extract_archive(archive, output_path):
+    """
+    Write each DICOM in a study archive straight to 0.dcm, 1.dcm, ... (sorted by member path).
+    Returns the file count.
+    """
+    with zipfile.ZipFile(archive, "r") as zf:
+        # Collect all DICOM files (.dcm or any file in the archive - Orthanc uses UUIDs)
+        members = sorted(name for name in zf.namelist() if not name.endswith("/"))
+        dcm_members = [name for name in members if name.endswith(".dcm")] or members
+        for i, name in enumerate(dcm_members):
+            with zf.open(name) as src, open(output_path / f"{i}.dcm", "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+    return len(dcm_members)
+
+
+async def download_study_dicoms(client, study_id, output_dir):
     """
-    Download study archive from Orthanc, extract, and normalize to 0.dcm, 1.dcm, ...
+    Download study archive from Orthanc and write its DICOMs as 0.dcm, 1.dcm, ...
+    The archive is buffered in a spooled temp file (memory up to ARCHIVE_SPOOL_MAX_BYTES),
+    so each DICOM is written to disk only once. Spool writes run in a worker thread: past
+    the limit they hit disk and would otherwise block the event loop.
     Returns (True, image_count) on success, (False, 0) on failure.
     """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
-    zip_path = output_path / "study.zip"
 
     try:
-        r = requests.get(
-            f"{ORTHANC_URL}/studies/{study_id}/archive",
-            auth=(ORTHANC_USER, ORTHANC_PASS),
-            stream=True,
-            timeout=60,
-        )
-        r.raise_for_status()
-
-        with open(zip_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-        extract_dir = output_path / "_extract"
-        extract_dir.mkdir(exist_ok=True)
-        with zipfile.ZipFile(zip_path, "r") as zf:
-            zf.extractall(extract_dir)
-
-        # Collect all DICOM files (.dcm or any file under extract dir - Orthanc uses UUIDs)
-        dcm_files = sorted(extract_dir.rglob("*.dcm"))
-        if not dcm_files:
-            dcm_files = [p for p in sorted(extract_dir.rglob("*")) if p.is_file()]
-
-        for i, src in enumerate(dcm_files):
-            dst = output_path / f"{i}.dcm"
-            shutil.copy2(src, dst)
-
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        zip_path.unlink(missing_ok=True)
-
-        return True, len(dcm_files)
+        with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_MAX_BYTES) as spool:
+            async with client.stream("GET", f"{ORTHANC_URL}/studies/{study_id}/archive", timeout=60) as r:
+                r.raise_for_status()
+                async for chunk in r.aiter_bytes(1 << 20):
+                    await asyncio.to_thread(spool.write, chunk)
+            spool.seek(0)
+            image_count = await asyncio.to_thread(_extract_archive, spool, output_path)
+        return True, image_count
     except Exception as e:
         print(f"Error downloading study: {e}")
-        if zip_path.exists():
-            zip_path.unlink(missing_ok=True)
-        extract_dir = output_path / "_extract"
-        if extract_dir.exists():
-            shutil.rmtree(extract_dir, ignore_errors=True)
         return False, 0
 
 
-def monitor_orthanc():
-    """Main loop: poll Orthanc every 30s, ingest new lumbar spine studies."""
-    print("Starting Orthanc monitor (poll every 30s)...")
-    processed = set()
-
-    while True:
-        try:
-            studies = get_orthanc_studies()
-            for study_id in studies:
-                if study_id in processed:
-                    continue
-
-                info = get_study_info(study_id)
-                if not info:
-                    continue
-
-                if not is_lumbar_spine_study(info):
-                    print(f"Study {study_id} is not lumbar spine, skipping")
-                    processed.add(study_id)
-                    continue
-
-                print(f"New lumbar spine study: {study_id}")
-
-                output_dir = UPLOADS_DIR / study_id
-                ok, image_count = download_study_dicoms(study_id, str(output_dir))
-                if not ok:
-                    print(f"Failed to download study {study_id}")
-                    continue
+async def ingest_study(client, download_slots, study_id, info):
+    """Download one lumbar spine study and record it as received. Returns False if the download failed."""
+    output_dir = UPLOADS_DIR / study_id
+    async with download_slots:
+        ok, image_count = await download_study_dicoms(client, study_id, str(output_dir))
+    if not ok:
+        print(f"Failed to download study {study_id}")
+        return False
+
+    main_tags = info.get("MainDicomTags", {})
+    patient_tags = info.get("PatientMainDicomTags") or {}
+    series = info.get("Series") or []
+
+    study_data = {
+        "study_id": study_id,
+        "accession_number": main_tags.get("AccessionNumber"),
+        "patient_id": patient_tags.get("PatientID"),
+        "patient_name": patient_tags.get("PatientName"),
+        "study_date": main_tags.get("StudyDate"),
+        "study_description": main_tags.get("StudyDescription"),
+        "series_count": len(series),
+        "image_count": image_count,
+    }
+    insert_study(study_data)
+    print(f"Study {study_id} saved (status=received, images={image_count})")
+    return True
+
+
+async def handle_study(client, download_slots, study_id):
+    """
+    Ingest one stable study if it is lumbar spine. Returns True when the study is finished
+    with (ingested, not lumbar spine, or gone from Orthanc), False if it should be retried.
+    """
+    try:
+        info = await get_study_info(client, study_id)
+    except StudyGone:
+        print(f"Study {study_id} no longer exists in Orthanc, dropping")
+        return True
+    if not info:
+        return False
 
-                main_tags = info.get("MainDicomTags", {})
-                patient_tags = info.get("PatientMainDicomTags") or {}
-                series = info.get("Series") or []
+    if not is_lumbar_spine_study(info):
+        print(f"Study {study_id} is not lumbar spine, skipping")
+        return True
 
-                study_data = {
-                    "study_id": study_id,
-                    "accession_number": main_tags.get("AccessionNumber"),
-                    "patient_id": patient_tags.get("PatientID"),
-                    "patient_name": patient_tags.get("PatientName"),
-                    "study_date": main_tags.get("StudyDate"),
-                    "study_description": main_tags.get("StudyDescription"),
-                    "series_count": len(series),
-                    "image_count": image_count,
-                }
-                insert_study(study_data)
-                print(f"Study {study_id} saved (status=received, images={image_count})")
-                processed.add(study_id)
+    print(f"New lumbar spine study: {study_id}")
+    return await ingest_study(client, download_slots, study_id, info)
 
-        except Exception as e:
-            print(f"Monitor error: {e}")
 
-        time.sleep(30)
+async def process_studies(client, download_slots, study_ids):
+    """
+    Handle stable studies concurrently. Studies already in the database are skipped, so
+    replayed change logs never download a study twice; failures are scheduled for retry.
+    """
+    known = get_existing_study_ids(study_ids)
+    study_ids = [study_id for study_id in study_ids if study_id not in known]
+    results = await asyncio.gather(
+        *(handle_study(client, download_slots, study_id) for study_id in study_ids),
+        return_exceptions=True,
+    )
+
+    finished = list(known)
+    for study_id, result in zip(study_ids, results):
+        if result is True:
+            finished.append(study_id)
+            continue
+        error = f"{result}" if isinstance(result, Exception) else "info lookup or download failed"
+        delay = record_orthanc_retry(study_id, error, RETRY_BASE_SEC, RETRY_MAX_SEC)
+        print(f"Study {study_id} failed ({error}); retrying in {delay}s")
+    clear_orthanc_retries(finished)
+
+
+async def monitor_orthanc():
+    """Main loop: follow Orthanc's change log, ingest lumbar spine studies as they become stable."""
+    last_seq = load_last_change_seq()
+    print(f"Starting Orthanc monitor (changes since {last_seq})...")
+    download_slots = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+
+    async with httpx.AsyncClient(
+        auth=(ORTHANC_USER, ORTHANC_PASS),
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS),
+        timeout=httpx.Timeout(5, pool=None),  # queued requests wait for a free connection
+    ) as client:
+        while True:
+            done = True
+            try:
+                page = await get_orthanc_changes(client, last_seq)
+                if page is not None:
+                    # StableStudy (not NewStudy): download only once Orthanc stopped receiving instances
+                    study_ids = list(dict.fromkeys(
+                        change["ID"] for change in page.get("Changes") or []
+                        if change.get("ChangeType") == "StableStudy"
+                    ))
+                    # Failures are recorded for retry, so the feed can always move on
+                    await process_studies(client, download_slots, study_ids)
+                    last_seq = page.get("Last", last_seq)
+                    save_last_change_seq(last_seq)
+                    done = page.get("Done", True)
+
+                due = get_due_orthanc_retries(CHANGES_BATCH_LIMIT)
+                if due:
+                    await process_studies(client, download_slots, due)
+            except Exception as e:
+                print(f"Monitor error: {e}")
+
+            if done:
+                await asyncio.sleep(CHANGES_POLL_SEC)
 
 
 if __name__ == "__main__":
-    monitor_orthanc()
+    asyncio.run(monitor_orthanc())
@@ -6,18 +6,50 @@ Usage:
 """
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
 
 ORTHANC_URL = os.environ.get("ORTHANC_URL", "http://localhost:8042")
 ORTHANC_USER = os.environ.get("ORTHANC_USERNAME", "admin")
 ORTHANC_PASS = os.environ.get("ORTHANC_PASSWORD", "orthanc")
 UPLOADS_DIR = Path(__file__).resolve().parent / "uploads"
+# Concurrent POSTs to /instances (each worker reuses a pooled keep-alive connection)
+UPLOAD_WORKERS = 16
+
+
+def _make_session() -> requests.Session:
+    """Session with Orthanc auth and a connection pool sized for UPLOAD_WORKERS."""
+    session = requests.Session()
+    session.auth = (ORTHANC_USER, ORTHANC_PASS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _upload_one(session: requests.Session, path: Path) -> dict:
+    """POST one DICOM file to Orthanc (streamed from the open file) and return the JSON response."""
+    with open(path, "rb") as f:
+        r = session.post(
+            f"{ORTHANC_URL}/instances",
+            data=f,
+            headers={
+                "Content-Type": "application/dicom",
+                "Content-Length": str(os.fstat(f.fileno()).st_size),
+            },
+            timeout=30,
+        )
+    r.raise_for_status()
+    j = r.json()
+    print(f"  Uploaded {path.name} -> instance {j.get('ID', '')}")
+    return j
 
 
 def send_folder_to_orthanc(folder_path: Path) -> tuple[list[str], str | None]:
-    """POST each .dcm file in folder to Orthanc. Returns (instance_ids, study_id)."""
+    """POST each .dcm file in folder to Orthanc (concurrently). Returns (instance_ids, study_id)."""
     folder_path = Path(folder_path)
     if not folder_path.is_dir():
         raise FileNotFoundError(f"Not a directory: {folder_path}")
@@ -26,24 +58,11 @@ def send_folder_to_orthanc(folder_path: Path) -> tuple[list[str], str | None]:
     if not dcm_files:
         raise FileNotFoundError(f"No .dcm files in {folder_path}")
 
-    instance_ids = []
-    study_id = None
-    for p in dcm_files:
-        with open(p, "rb") as f:
-            data = f.read()
-        r = requests.post(
-            f"{ORTHANC_URL}/instances",
-            auth=(ORTHANC_USER, ORTHANC_PASS),
-            data=data,
-            headers={"Content-Type": "application/dicom"},
-            timeout=30,
-        )
-        r.raise_for_status()
-        j = r.json()
-        instance_ids.append(j.get("ID", ""))
-        study_id = study_id or j.get("ParentStudy")
-        print(f"  Uploaded {p.name} -> instance {j.get('ID', '')}")
+    with _make_session() as session, ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as ex:
+        results = list(ex.map(lambda p: _upload_one(session, p), dcm_files))
 
+    instance_ids = [j.get("ID", "") for j in results]
+    study_id = next((j.get("ParentStudy") for j in results if j.get("ParentStudy")), None)
     return instance_ids, study_id
 
 